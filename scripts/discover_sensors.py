@@ -3,6 +3,7 @@ import logging
 import os
 import sys
 
+import msgspec
 import requests
 from dotenv import load_dotenv
 
@@ -30,7 +31,7 @@ class SensorDiscovery:
         try:
             res = requests.get(url, headers=self.headers, timeout=15)
             res.raise_for_status()
-            sensors = res.json().get("results", [])
+            sensors = msgspec.json.decode(res.content).get("results", [])
 
             print(f"\n{'=' * 60}")
             print(f"LOCATION: {location_name} (ID: {location_id})")
@@ -48,19 +49,19 @@ class SensorDiscovery:
                 print(f"  Last Value: {s.get('latest', {}).get('value', 'N/A')}")
                 print("-" * 30)
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch sensors for ID {location_id}: {e}")
+        except (requests.exceptions.RequestException, msgspec.DecodeError) as e:
+            logger.error("Failed to fetch sensors for ID %s: %s", location_id, e)
 
     def discover_by_name(self, name: str):
         """Searches for a location ID by name first, then finds sensors."""
-        logger.info(f"Searching for location matching: '{name}'")
+        logger.info("Searching for location matching: '%s'", name)
         url = f"{BASE_URL}/locations"
         params = {"name": name}
 
         try:
             res = requests.get(url, params=params, headers=self.headers, timeout=15)
             res.raise_for_status()
-            results = res.json().get("results", [])
+            results = msgspec.json.decode(res.content).get("results", [])
 
             if not results:
                 print(f"No locations found matching '{name}'.")
@@ -70,13 +71,13 @@ class SensorDiscovery:
             loc = results[0]
             if len(results) > 1:
                 logger.warning(
-                    f"Multiple matches found. Using first result: {loc['name']}"
+                    "Multiple matches found. Using first result: %s", loc["name"]
                 )
 
             self.print_sensors(loc["id"], loc["name"])
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Discovery API error: {e}")
+        except (requests.exceptions.RequestException, msgspec.DecodeError) as e:
+            logger.error("Discovery API error: %s", e)
 
 
 def main():
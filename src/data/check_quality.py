@@ -2,60 +2,193 @@ import argparse
 import logging
 import os
 import sys
+from typing import Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+# Columns consumed by validation and by the Silver layer
+RAW_COLUMNS = ["timestamp", "value", "parameter", "station"]
+
+
+def _timestamp_range(path: str) -> Optional[tuple]:
+    """
+    Return the (min, max) timestamp of a Parquet file from its footer.
+
+    Only row-group statistics are read, no column data. Returns None when the
+    column is not a typed timestamp or statistics are missing.
+    """
+
+    pf = pq.ParquetFile(path)
+    index = pf.schema_arrow.get_field_index("timestamp")
+    if index < 0 or not pa.types.is_timestamp(pf.schema_arrow.field(index).type):
+        return None
+
+    stats = [
+        pf.metadata.row_group(i).column(index).statistics
+        for i in range(pf.num_row_groups)
+    ]
+    if not stats or not all(s is not None and s.has_min_max for s in stats):
+        return None
+
+    return min(s.min for s in stats), max(s.max for s in stats)
+
+
+def _utc_timestamps(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Return the timestamp column as UTC, parsing it if stored as strings."""
+
+    # Bronze files written by fetch_data already store a typed UTC column;
+    # older ones hold strings, which are parsed leniently (bad values -> null)
+    if pa.types.is_timestamp(column.type):
+        return column.cast(pa.timestamp(column.type.unit, tz="UTC"))
+
+    parsed = pd.to_datetime(
+        column.to_pandas(), format="ISO8601", utc=True, errors="coerce"
+    )
+    return pa.chunked_array([pa.array(parsed)])
+
+
+def check_raw_data(
+    input_path: str, *, strict: bool = True, write_clean: Optional[str] = None
+) -> pa.Table:
+    """
+    Validate a Bronze Parquet file and return its cleaned rows.
+
+    Timestamps are normalized to UTC, and rows with missing values, negative
+    physical readings or out-of-range temperatures are filtered out.
+
+    Args:
+        input_path: Path to the Bronze Parquet file
+        strict: Stop the pipeline on unparseable timestamps or an empty result;
+            when False, such rows are dropped and issues are only logged
+        write_clean: Optional path to save the cleaned rows (Silver layer)
+
+    Returns:
+        Arrow table with the cleaned rows
+    """
 
-def validate_and_clean_data(input_path: str, output_path: str) -> None:
     try:
-        df = pd.read_parquet(input_path)
+        # Drop pandas metadata, it would describe the pre-cleaning dtypes
+        table = pq.read_table(input_path, columns=RAW_COLUMNS)
+        table = table.replace_schema_metadata()
     except Exception as e:
-        logging.error(f"CRITICAL: Failed to read file: {e}")
+        logging.error("CRITICAL: Failed to read file: %s", e)
         sys.exit(1)
 
-    initial_rows = len(df)
+    initial_rows = table.num_rows
     logging.info("--- Data Quality Check ---")
-    logging.info(f"Loaded {initial_rows} rows from Bronze.")
+    logging.info("Loaded %s rows from Bronze.", initial_rows)
+
+    time_range = _timestamp_range(input_path)
+    if time_range:
+        logging.info("Time range: %s -> %s", *time_range)
 
     # 1. Convert timestamp to datetime format
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
+    timestamps = _utc_timestamps(table["timestamp"])
+    table = table.set_column(
+        table.schema.get_field_index("timestamp"), "timestamp", timestamps
+    )
 
     # 2. Check schema
-    if df["timestamp"].isnull().any():
-        logging.error("CRITICAL: Found unparseable timestamps! Pipeline stopped.")
-        sys.exit(1)
+    bad_timestamps = pc.is_null(timestamps)
+    if pc.any(bad_timestamps).as_py():
+        if strict:
+            logging.error("CRITICAL: Found unparseable timestamps! Pipeline stopped.")
+            sys.exit(1)
+        logging.warning(
+            "Dropping %s rows with unparseable timestamps.", pc.sum(bad_timestamps)
+        )
 
-    # 3. Data cleaning
+    # 3. Data cleaning, with masks computed by Arrow compute kernels directly
+    # on the column buffers (dictionary-encoded parameters compare as codes)
     physical_params = ["pm25", "pm10", "humidity"]
 
-    invalid_physical = (df["parameter"].isin(physical_params)) & (df["value"] < 0)
-    invalid_temp = (df["parameter"] == "temp") & (
-        (df["value"] < -50) | (df["value"] > 60)
+    param = table["parameter"]
+    val = table["value"]
+
+    invalid_physical = pc.and_(
+        pc.is_in(param, value_set=pa.array(physical_params)), pc.less(val, 0)
+    )
+    invalid_temp = pc.and_(
+        pc.is_in(param, value_set=pa.array(["temp"])),
+        pc.or_(pc.less(val, -50), pc.greater(val, 60)),
     )
 
-    mask_to_keep = ~(invalid_physical | invalid_temp)
-    df_clean = df[mask_to_keep]
+    # Rows without a value, parameter or station cannot be loaded either, so
+    # they are folded into the same mask and removed in a single pass. Each
+    # row is counted under one reason only: bad timestamp, missing, anomalous
+    missing = pc.and_(
+        pc.or_(
+            pc.is_null(val, nan_is_null=True),
+            pc.or_(pc.is_null(param), pc.is_null(table["station"])),
+        ),
+        pc.invert(bad_timestamps),
+    )
+    anomalous = pc.and_(
+        pc.fill_null(pc.or_(invalid_physical, invalid_temp), False),
+        pc.invert(pc.or_(missing, bad_timestamps)),
+    )
+    invalid = pc.or_(pc.or_(anomalous, missing), bad_timestamps)
+
+    # any() exits on the first match; the table is only copied when needed
+    if pc.any(invalid).as_py():
+        table_clean = table.filter(pc.invert(invalid))
+        if pc.any(missing).as_py():
+            logging.warning("Dropped %s rows with missing values.", pc.sum(missing))
+        if pc.any(anomalous).as_py():
+            logging.warning(
+                "Filtered out %s anomalous rows (negative PM or crazy temp).",
+                pc.sum(anomalous),
+            )
+        # Rendering the rows is costly, so only do it when it will be shown
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                "Invalid rows:\n%s", table.filter(invalid).to_pandas().to_string()
+            )
+    else:
+        table_clean = table
 
-    removed_rows = initial_rows - len(df_clean)
-    if removed_rows > 0:
-        logging.warning(
-            f"Filtered out {removed_rows} anomalous rows (negative PM or crazy temp)."
+    # 4. Staging
+    if table_clean.num_rows == 0:
+        if strict:
+            logging.error(
+                "CRITICAL: Dataframe is empty after cleaning. Nothing to load!"
+            )
+            sys.exit(1)
+        # Still write the empty file below, so a stale Silver file from an
+        # earlier run is not left behind for the load step
+        logging.warning("Dataframe is empty after cleaning.")
+
+    if write_clean:
+        os.makedirs(os.path.dirname(write_clean), exist_ok=True)
+
+        pq.write_table(
+            table_clean,
+            write_clean,
+            compression="zstd",
+            compression_level=3,
+            use_dictionary=["parameter", "station"],
+            row_group_size=64_000,
+        )
+        logging.info(
+            "Successfully saved %s cleaned rows to %s",
+            table_clean.num_rows,
+            write_clean,
         )
 
-    # 4. Staging
-    if df_clean.empty:
-        logging.error("CRITICAL: Dataframe is empty after cleaning. Nothing to load!")
-        sys.exit(1)
+    return table_clean
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    df_clean.to_parquet(output_path, index=False, compression="snappy")
-    logging.info(f"Successfully saved {len(df_clean)} cleaned rows to {output_path}")
+def validate_and_clean_data(input_path: str, output_path: str) -> None:
+    """Strictly validate a Bronze file and save the cleaned Silver file."""
+    check_raw_data(input_path, strict=True, write_clean=output_path)
 
 
-if __name__ == "__main__":
+def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--input", type=str, default="data/raw/katowice_kossutha.parquet"
@@ -63,6 +196,16 @@ if __name__ == "__main__":
     parser.add_argument(
         "--output", type=str, default="data/clean/katowice_kossutha_clean.parquet"
     )
+    parser.add_argument(
+        "--no-strict",
+        dest="strict",
+        action="store_false",
+        help="Drop rows with unparseable timestamps instead of stopping",
+    )
     args = parser.parse_args()
 
-    validate_and_clean_data(args.input, args.output)
+    check_raw_data(args.input, strict=args.strict, write_clean=args.output)
+
+
+if __name__ == "__main__":
+    main()
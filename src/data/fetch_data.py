@@ -2,10 +2,16 @@ import argparse
 import logging
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from itertools import repeat
+from typing import Dict, Iterator, List, Optional, Union
 
+import msgspec
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import requests
 import yaml
 from dotenv import load_dotenv
@@ -15,116 +21,404 @@ from urllib3.util.retry import Retry
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+# Upper bound on concurrent sensor requests (and pooled connections)
+MAX_WORKERS = 16
 
-def fetch_station(
-    station_name: str = "kossutha", api_key: Optional[str] = None, days: int = 7
-) -> pd.DataFrame:
-    """
-    Fetch air quality measurements for a station from OpenAQ API.
+# Page size accepted by the OpenAQ measurements endpoint, and a cap on pages
+# fetched per sensor to bound memory on very long history pulls
+PAGE_LIMIT = 1000
+MAX_PAGES = 50
 
-    Args:
-        station_name: Station key from config/stations.yaml
-        api_key: OpenAQ API key
-        days: Number of days of history to fetch
+# OpenAQ local timestamps carry their UTC offset, e.g. 2026-06-06T12:00:00+02:00
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
 
-    Returns:
-        DataFrame with columns: timestamp, value, parameter, station
-    """
+# Bronze layer schema; low-cardinality strings are dictionary-encoded
+SCHEMA = pa.schema(
+    [
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("value", pa.float64()),
+        ("parameter", pa.dictionary(pa.int8(), pa.string())),
+        ("station", pa.dictionary(pa.int8(), pa.string())),
+    ]
+)
 
-    if not api_key:
-        raise ValueError("api_key is required")
 
-    all_measurements = []
+class DatetimeRef(msgspec.Struct):
+    local: str
 
-    # Read sensors from stations.yaml
-    with open("config/stations.yaml", "r") as f:
-        config = yaml.safe_load(f)
 
-    if station_name not in config["stations"]:
-        available = list(config["stations"].keys())
-        raise ValueError(f"Station '{station_name}' not found. Available: {available}")
+class Period(msgspec.Struct, rename="camel"):
+    datetime_to: DatetimeRef
+
 
-    sensors = config["stations"][station_name]["sensors"]
+class Parameter(msgspec.Struct):
+    name: str
+
+
+class Measurement(msgspec.Struct):
+    period: Period
+    value: Optional[float]
+    parameter: Parameter
+
+
+class Meta(msgspec.Struct):
+    # OpenAQ reports large counts as strings such as ">1000"
+    found: Union[int, str, None] = None
+
+
+class MeasurementsPage(msgspec.Struct):
+    """Typed view of one /sensors/{id}/measurements response page."""
+
+    results: List[Measurement]
+    meta: Meta = msgspec.field(default_factory=Meta)
+
+
+# Decoder is built once; unknown response fields are skipped without allocation
+PAGE_DECODER = msgspec.json.Decoder(MeasurementsPage)
+
+
+def _empty_columns() -> Dict[str, List]:
+    return {name: [] for name in SCHEMA.names}
+
+
+def load_stations(path: str = "config/stations.yaml") -> Dict[str, Dict]:
+    """Return the station registry from config/stations.yaml."""
+    with open(path, "r") as f:
+        return yaml.safe_load(f)["stations"]
+
+
+def start_date(days: int) -> str:
+    """Return the UTC start of a days-long window, formatted for OpenAQ."""
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+
+
+def _build_session(pool_size: int = MAX_WORKERS) -> requests.Session:
+    """
+    Create a requests session with retries and a keep-alive connection pool.
+
+    Args:
+        pool_size: Number of pooled connections, one per concurrent request
+    """
 
-    # Set up session
     session = requests.Session()
     retries = Retry(
         total=3,
         backoff_factor=1,
         status_forcelist=[429, 500, 502, 503, 504],
     )
-    session.mount("https://", HTTPAdapter(max_retries=retries))
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            max_retries=retries,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+        ),
+    )
+    return session
 
-    headers = {"X-API-Key": api_key}
 
-    start_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
-    params = {"datetime_from": start_date, "limit": 1000}
+def _fetch_sensor(
+    session: requests.Session,
+    sensor_id: int,
+    name: str,
+    station_name: str,
+    headers: Dict[str, str],
+    params: Dict[str, object],
+) -> Dict[str, List]:
+    """
+    Fetch measurements for a single sensor, following pagination.
 
-    # Get sensors measurements (timestamp, value, parameter)
-    for name, id in sensors.items():
+    Measurements are accumulated column-wise (one list per SCHEMA column)
+    rather than as one dict per row. Request errors and malformed responses
+    are logged and yield empty columns, so one failing sensor does not abort
+    the whole station.
+    """
+
+    columns = _empty_columns()
+
+    for page in range(1, MAX_PAGES + 1):
         try:
             response = session.get(
-                f"https://api.openaq.org/v3/sensors/{id}/measurements",
+                f"https://api.openaq.org/v3/sensors/{sensor_id}/measurements",
                 headers=headers,
-                params=params,
+                params={**params, "limit": PAGE_LIMIT, "page": page},
                 timeout=20,
             )
             response.raise_for_status()
         except requests.exceptions.ConnectionError as e:
-            logging.error(f"Connection failed for {name}: {e}")
-            continue
+            logging.error("Connection failed for %s: %s", name, e)
+            return _empty_columns()
         except requests.exceptions.Timeout as e:
-            logging.error(f"Timeout for {name}: {e}")
-            continue
+            logging.error("Timeout for %s: %s", name, e)
+            return _empty_columns()
         except requests.exceptions.HTTPError as e:
-            logging.error(f"HTTP error for {name}: {e}")
-            continue
+            logging.error("HTTP error for %s: %s", name, e)
+            return _empty_columns()
         except requests.exceptions.RequestException as e:
-            logging.error(f"Unexpected error for {name}: {e}")
-            continue
-
-        data = response.json()
-
-        measurements = []
-        for result in data["results"]:
-            measurements.append(
-                {
-                    "timestamp": result["period"]["datetimeTo"]["local"],
-                    "value": result["value"],
-                    "parameter": result["parameter"]["name"],
-                    "station": station_name,
-                }
-            )
+            logging.error("Unexpected error for %s: %s", name, e)
+            return _empty_columns()
+
+        # Decode the raw bytes straight into typed structs
+        try:
+            data = PAGE_DECODER.decode(response.content)
+        except msgspec.DecodeError as e:
+            logging.error("Malformed response for %s: %s", name, e)
+            return _empty_columns()
+        results = data.results
+
+        columns["timestamp"].extend([r.period.datetime_to.local for r in results])
+        columns["value"].extend([r.value for r in results])
+        columns["parameter"].extend([r.parameter.name for r in results])
+        columns["station"].extend([station_name] * len(results))
+
+        # A short page is the last one; "found" is only trusted when numeric
+        found = data.meta.found
+        if len(results) < PAGE_LIMIT:
+            break
+        if isinstance(found, int) and len(columns["value"]) >= found:
+            break
+    else:
+        logging.warning(
+            "Reached %s pages for %s, data may be truncated", MAX_PAGES, name
+        )
+
+    logging.info("Fetched %s records for %s", len(columns["value"]), name)
+    return columns
+
+
+def _to_table(columns: Dict[str, List]) -> pa.Table:
+    """Build a SCHEMA table from accumulated columns."""
+
+    # Parse timestamps once here, so readers get a typed UTC column; values
+    # that fail to parse become nulls and are rejected by check_quality
+    columns = {
+        **columns,
+        "timestamp": pc.strptime(
+            pa.array(columns["timestamp"], pa.string()),
+            format=TIMESTAMP_FORMAT,
+            unit="us",
+            error_is_null=True,
+        ),
+    }
+    return pa.Table.from_pydict(columns, schema=SCHEMA)
+
+
+def iter_station_tables(
+    station_name: str = "kossutha",
+    api_key: Optional[str] = None,
+    days: int = 7,
+    datetime_from: Optional[str] = None,
+) -> Iterator[pa.Table]:
+    """
+    Fetch air quality measurements for a station from OpenAQ API.
+
+    Sensors are requested concurrently over one shared session, so the total
+    wall time is close to the slowest single request. Each sensor's data is
+    yielded as its own table as soon as it arrives; sensors without data are
+    skipped.
+
+    Args:
+        station_name: Station key from config/stations.yaml
+        api_key: OpenAQ API key
+        days: Number of days of history to fetch
+        datetime_from: Optional start of the window (see start_date); derived
+            from days when omitted
+
+    Yields:
+        Arrow tables with SCHEMA columns: timestamp, value, parameter, station
+    """
+
+    if not api_key:
+        raise ValueError("api_key is required")
+
+    # Read sensors from stations.yaml
+    stations = load_stations()
+
+    if station_name not in stations:
+        available = list(stations.keys())
+        raise ValueError(f"Station '{station_name}' not found. Available: {available}")
+
+    sensors = stations[station_name]["sensors"]
+
+    # Set up session, with one pooled connection per concurrent sensor
+    workers = min(len(sensors), MAX_WORKERS)
+    session = _build_session(workers)
+
+    headers = {"X-API-Key": api_key}
+
+    params = {"datetime_from": datetime_from or start_date(days)}
+
+    # Get sensors measurements (timestamp, value, parameter)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _fetch_sensor, session, id, name, station_name, headers, params
+                )
+                for name, id in sensors.items()
+            ]
+            for future in as_completed(futures):
+                columns = future.result()
+                if columns["value"]:
+                    yield _to_table(columns)
+    finally:
+        session.close()
+
+
+def fetch_station_table(
+    station_name: str = "kossutha",
+    api_key: Optional[str] = None,
+    days: int = 7,
+    datetime_from: Optional[str] = None,
+) -> pa.Table:
+    """
+    Fetch air quality measurements for a station as a single Arrow table.
+
+    See iter_station_tables for arguments.
+
+    Returns:
+        Arrow table with SCHEMA columns: timestamp, value, parameter, station
+    """
 
-        all_measurements.extend(measurements)
-        logging.info(f"Fetched {len(measurements)} records for {name}")
+    tables = list(
+        iter_station_tables(
+            station_name,
+            api_key=api_key,
+            days=days,
+            datetime_from=datetime_from,
+        )
+    )
 
-    if not all_measurements:
-        logging.warning(f"No data fetched for station: {station_name}")
+    if not tables:
+        logging.warning("No data fetched for station: %s", station_name)
         sys.exit(1)
 
-    df = pd.DataFrame(all_measurements)
-    return df
+    return pa.concat_tables(tables)
 
 
-if __name__ == "__main__":
+def fetch_station(
+    station_name: str = "kossutha",
+    api_key: Optional[str] = None,
+    days: int = 7,
+    datetime_from: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Fetch air quality measurements for a station as a DataFrame.
+
+    See fetch_station_table for arguments.
+
+    Returns:
+        DataFrame with columns: timestamp, value, parameter, station
+    """
+
+    table = fetch_station_table(
+        station_name,
+        api_key=api_key,
+        days=days,
+        datetime_from=datetime_from,
+    )
+    return table.to_pandas()
+
+
+def process_station(
+    station_name: str,
+    api_key: str,
+    datetime_from: str,
+    output_dir: str = "data/raw",
+) -> int:
+    """
+    Fetch one station and write its Bronze Parquet file.
+
+    Runs standalone (own session, own Parquet encoder), so it can be used as
+    a process pool worker when several stations are fetched at once.
+
+    Args:
+        station_name: Station key from config/stations.yaml
+        api_key: OpenAQ API key
+        datetime_from: Start of the window (see start_date)
+        output_dir: Directory for katowice_<station>.parquet
+
+    Returns:
+        Number of rows written, 0 if no data was fetched
+    """
+
+    # Stream data to a .parquet file straight from Arrow: each sensor is
+    # written as its own row group once it arrives
+    output_path = os.path.join(output_dir, f"katowice_{station_name}.parquet")
+    writer = None
+    total_rows = 0
+    try:
+        for table in iter_station_tables(
+            station_name, api_key=api_key, datetime_from=datetime_from
+        ):
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    output_path, SCHEMA, compression="zstd", use_dictionary=True
+                )
+            writer.write_table(table)
+            total_rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        logging.warning("No data fetched for station: %s", station_name)
+        return 0
+
+    logging.info("Saved %s rows for %s to %s", total_rows, station_name, output_path)
+    return total_rows
+
+
+def main() -> None:
     # Read arguments from terminal
     parser = argparse.ArgumentParser()
-    parser.add_argument("--station", type=str, default="kossutha")
+    parser.add_argument(
+        "--station",
+        type=str,
+        nargs="+",
+        default=["kossutha"],
+        help="Station keys from config/stations.yaml, or 'all'",
+    )
     parser.add_argument("--days", type=int, default=7)
     args = parser.parse_args()
 
+    if "all" in args.station and len(args.station) > 1:
+        parser.error("'all' cannot be combined with other station names")
+
     # Check if api_key exists
     api_key = os.getenv("OPENAQ_API_KEY")
     if not api_key:
         raise ValueError("OPENAQ_API_KEY not found in .env")
 
-    # Fetch station data
-    station_name = args.station
-    df = fetch_station(station_name, api_key=api_key, days=args.days)
+    stations = args.station
+    if stations == ["all"]:
+        stations = list(load_stations().keys())
 
-    # Save station data to .parquet file
-    df.to_parquet(
-        f"data/raw/katowice_{station_name}.parquet", index=False, compression="snappy"
-    )
-    logging.info(f"Saved {len(df)} total rows")
+    # One window start for the whole run, shared by every station
+    datetime_from = start_date(args.days)
+
+    # Several stations are fetched and encoded in parallel processes
+    if len(stations) == 1:
+        rows = [process_station(stations[0], api_key, datetime_from)]
+    else:
+        workers = min(len(stations), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(
+                executor.map(
+                    process_station,
+                    stations,
+                    repeat(api_key),
+                    repeat(datetime_from),
+                )
+            )
+
+    if not all(rows):
+        sys.exit(1)
+
+    logging.info("Saved %s total rows", sum(rows))
+
+
+if __name__ == "__main__":
+    main()
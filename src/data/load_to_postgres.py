@@ -8,6 +8,8 @@ import psycopg2
 from dotenv import load_dotenv
 from psycopg2.extras import execute_values
 
+from data.check_quality import RAW_COLUMNS
+
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
@@ -34,7 +36,7 @@ def load_to_postgres(parquet_path: str) -> None:
     if not Path(parquet_path).exists():
         raise FileNotFoundError("Parquet file not found. Run 'just fetch' first.")
 
-    df = pd.read_parquet(parquet_path)
+    df = pd.read_parquet(parquet_path, columns=RAW_COLUMNS)
     if df.empty:
         logging.warning("No data to load")
         return
@@ -49,11 +51,7 @@ def load_to_postgres(parquet_path: str) -> None:
     ) as conn:
         # Insert data to table measurements
         with conn.cursor() as cursor:
-            rows = (
-                df[["timestamp", "value", "parameter", "station"]]
-                .to_records(index=False)
-                .tolist()
-            )
+            rows = df.to_records(index=False).tolist()
 
             execute_values(
                 cursor,
@@ -69,7 +67,7 @@ def load_to_postgres(parquet_path: str) -> None:
             skipped = len(rows) - inserted
 
         conn.commit()
-        logging.info(f"Inserted: {inserted} | Skipped: {skipped}")
+        logging.info("Inserted: %s | Skipped: %s", inserted, skipped)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+import logging
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data.check_quality import check_raw_data, validate_and_clean_data
+from data.fetch_data import SCHEMA
+
+
+def write_raw(path, rows):
+    pd.DataFrame(
+        rows, columns=["timestamp", "value", "parameter", "station"]
+    ).to_parquet(path, index=False)
+
+
+def test_validate_filters_anomalous_rows(tmp_path):
+    """Verify missing, negative physical and out-of-range temp values are dropped."""
+    raw = tmp_path / "raw.parquet"
+    clean = tmp_path / "clean" / "clean.parquet"
+    write_raw(
+        raw,
+        [
+            ("2026-06-06T12:00:00+02:00", 15.5, "pm25", "zawodzie"),
+            ("2026-06-06T12:00:00+02:00", -1.0, "pm25", "zawodzie"),
+            ("2026-06-06T12:00:00+02:00", -5.0, "temp", "zawodzie"),
+            ("2026-06-06T12:00:00+02:00", 75.0, "temp", "zawodzie"),
+            ("2026-06-06T12:00:00+02:00", -3.0, "humidity", "zawodzie"),
+            ("2026-06-06T12:00:00+02:00", None, "pm10", "zawodzie"),
+        ],
+    )
+
+    validate_and_clean_data(str(raw), str(clean))
+
+    df = pd.read_parquet(clean)
+    assert sorted(df["value"].tolist()) == [-5.0, 15.5]
+    assert str(df["timestamp"].dt.tz) == "UTC"
+
+
+def test_validate_exits_on_unparseable_timestamp(tmp_path):
+    """Ensure the pipeline stops when a timestamp cannot be parsed."""
+    raw = tmp_path / "raw.parquet"
+    write_raw(raw, [("not-a-date", 15.5, "pm25", "kossutha")])
+
+    with pytest.raises(SystemExit):
+        validate_and_clean_data(str(raw), str(tmp_path / "clean" / "clean.parquet"))
+
+
+def test_check_raw_data_non_strict_drops_unparseable_timestamps(tmp_path, caplog):
+    """Verify non-strict mode drops bad timestamps instead of stopping."""
+    raw = tmp_path / "raw.parquet"
+    write_raw(
+        raw,
+        [
+            ("not-a-date", 15.5, "pm25", "kossutha"),
+            ("not-a-date", None, "pm25", "kossutha"),
+            ("2026-06-06T12:00:00+02:00", None, "pm25", "kossutha"),
+            ("2026-06-06T12:00:00+02:00", 12.0, "pm25", "kossutha"),
+        ],
+    )
+
+    with caplog.at_level(logging.WARNING):
+        table = check_raw_data(str(raw), strict=False)
+
+    assert table["value"].to_pylist() == [12.0]
+    assert not (tmp_path / "clean").exists()
+
+    # Each dropped row is reported under exactly one reason
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Dropping 2 rows with unparseable timestamps." in messages
+    assert "Dropped 1 rows with missing values." in messages
+
+
+def test_check_raw_data_non_strict_overwrites_stale_output(tmp_path):
+    """Verify an empty non-strict result still replaces the Silver file."""
+    raw = tmp_path / "raw.parquet"
+    clean = tmp_path / "clean" / "clean.parquet"
+    write_raw(raw, [("2026-06-06T12:00:00+02:00", 12.0, "pm25", "kossutha")])
+    check_raw_data(str(raw), write_clean=str(clean))
+
+    write_raw(raw, [("not-a-date", 15.5, "pm25", "kossutha")])
+    table = check_raw_data(str(raw), strict=False, write_clean=str(clean))
+
+    assert table.num_rows == 0
+    assert pd.read_parquet(clean).empty
+
+
+def test_validate_keeps_clean_typed_bronze(tmp_path):
+    """Verify a typed Bronze file with no anomalies passes through unchanged."""
+    raw = tmp_path / "raw.parquet"
+    clean = tmp_path / "clean" / "clean.parquet"
+    timestamp = datetime(2026, 6, 6, 10, tzinfo=timezone.utc)
+    table = pa.Table.from_pydict(
+        {
+            "timestamp": [timestamp, timestamp],
+            "value": [15.5, 21.0],
+            "parameter": ["pm25", "temp"],
+            "station": ["zawodzie", "zawodzie"],
+        },
+        schema=SCHEMA,
+    )
+    pq.write_table(table, raw)
+
+    validate_and_clean_data(str(raw), str(clean))
+
+    df = pd.read_parquet(clean)
+    assert df["value"].tolist() == [15.5, 21.0]
+    assert (df["timestamp"] == pd.Timestamp(timestamp)).all()
@@ -1,9 +1,13 @@
 import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
 
 import pandas as pd
+import pyarrow.parquet as pq
 import pytest
 
-from data.fetch_data import fetch_station
+from data import fetch_data
+from data.fetch_data import fetch_station, iter_station_tables, process_station
 
 
 def test_fetch_station_value_error_without_api_key():
@@ -36,6 +40,224 @@ def test_fetch_station_mock_success(requests_mock):
     assert isinstance(df, pd.DataFrame)
     assert not df.empty
     assert "timestamp" in df.columns
+    assert df.iloc[0]["timestamp"] == pd.Timestamp("2026-06-06T10:00:00Z")
     assert df.iloc[0]["value"] == 15.5
     assert df.iloc[0]["parameter"] == "pm25"
     assert df.iloc[0]["station"] == "kossutha"
+
+
+def test_fetch_station_skips_failed_sensor(requests_mock):
+    """Verify that one failing sensor does not drop the other sensors' data."""
+    mock_response = {
+        "results": [
+            {
+                "period": {"datetimeTo": {"local": "2026-06-06T12:00:00+02:00"}},
+                "value": 21.0,
+                "parameter": {"name": "temp"},
+            }
+        ]
+    }
+
+    requests_mock.get(
+        re.compile(r"https://api.openaq.org/v3/sensors/\d+/measurements"),
+        json=mock_response,
+    )
+    requests_mock.get(
+        "https://api.openaq.org/v3/sensors/14152505/measurements", status_code=404
+    )
+
+    df = fetch_station(station_name="zawodzie", api_key="fake_test_key", days=1)
+
+    # zawodzie has three sensors, one of which fails
+    assert len(df) == 2
+    assert requests_mock.call_count == 3
+
+
+def test_fetch_station_follows_pagination(requests_mock, monkeypatch):
+    """Verify that full pages trigger a request for the next page."""
+    monkeypatch.setattr("data.fetch_data.PAGE_LIMIT", 2)
+    row = {
+        "period": {"datetimeTo": {"local": "2026-06-06T12:00:00+02:00"}},
+        "value": 40.0,
+        "parameter": {"name": "pm10"},
+    }
+
+    def paged_response(request, context):
+        # Two full pages followed by a short one
+        page = int(request.qs["page"][0])
+        return {"results": [row, row] if page < 3 else [row]}
+
+    requests_mock.get(
+        re.compile(r"https://api.openaq.org/v3/sensors/\d+/measurements"),
+        json=paged_response,
+    )
+
+    df = fetch_station(station_name="zawodzie", api_key="fake_test_key", days=1)
+
+    # zawodzie has three sensors, each returning 5 rows across 3 pages
+    assert len(df) == 15
+    assert requests_mock.call_count == 9
+
+
+def test_fetch_station_skips_malformed_response(requests_mock):
+    """Verify that a response missing expected fields only drops that sensor."""
+    mock_response = {
+        "results": [
+            {
+                "period": {"datetimeTo": {"local": "2026-06-06T12:00:00+02:00"}},
+                "value": 55.0,
+                "parameter": {"name": "humidity"},
+            }
+        ]
+    }
+
+    requests_mock.get(
+        re.compile(r"https://api.openaq.org/v3/sensors/\d+/measurements"),
+        json=mock_response,
+    )
+    requests_mock.get(
+        "https://api.openaq.org/v3/sensors/14152507/measurements",
+        json={"results": [{"value": 21.0}]},
+    )
+
+    df = fetch_station(station_name="zawodzie", api_key="fake_test_key", days=1)
+
+    assert len(df) == 2
+    assert set(df["parameter"]) == {"humidity"}
+
+
+def test_iter_station_tables_yields_one_table_per_sensor(requests_mock):
+    """Verify each sensor's data arrives as a separate table (one row group)."""
+    mock_response = {
+        "results": [
+            {
+                "period": {"datetimeTo": {"local": "2026-06-06T12:00:00+02:00"}},
+                "value": 10.0,
+                "parameter": {"name": "pm25"},
+            }
+        ]
+    }
+
+    requests_mock.get(
+        re.compile(r"https://api.openaq.org/v3/sensors/\d+/measurements"),
+        json=mock_response,
+    )
+
+    tables = list(
+        iter_station_tables(station_name="zawodzie", api_key="fake_test_key", days=1)
+    )
+
+    assert len(tables) == 3
+    assert all(table.num_rows == 1 for table in tables)
+
+
+def test_fetch_station_uses_shared_datetime_from(requests_mock):
+    """Verify every sensor request uses the same explicit window start."""
+    requests_mock.get(
+        re.compile(r"https://api.openaq.org/v3/sensors/\d+/measurements"),
+        json={
+            "results": [
+                {
+                    "period": {"datetimeTo": {"local": "2026-06-06T12:00:00+02:00"}},
+                    "value": 3.0,
+                    "parameter": {"name": "no2"},
+                }
+            ]
+        },
+    )
+
+    fetch_station(
+        station_name="kossutha",
+        api_key="fake_test_key",
+        datetime_from="2026-06-05T10:00:00Z",
+    )
+
+    starts = {
+        parse_qs(urlparse(request.url).query)["datetime_from"][0]
+        for request in requests_mock.request_history
+    }
+    assert starts == {"2026-06-05T10:00:00Z"}
+
+
+def test_process_station_writes_one_row_group_per_sensor(requests_mock, tmp_path):
+    """Verify a station worker writes its own Parquet file, one row group per sensor."""
+    requests_mock.get(
+        re.compile(r"https://api.openaq.org/v3/sensors/\d+/measurements"),
+        json={
+            "results": [
+                {
+                    "period": {"datetimeTo": {"local": "2026-06-06T12:00:00+02:00"}},
+                    "value": 30.0,
+                    "parameter": {"name": "pm25"},
+                }
+            ]
+        },
+    )
+
+    rows = process_station(
+        "zawodzie", "fake_test_key", "2026-06-05T10:00:00Z", output_dir=str(tmp_path)
+    )
+
+    parquet_file = pq.ParquetFile(tmp_path / "katowice_zawodzie.parquet")
+    assert rows == 3
+    assert parquet_file.metadata.num_rows == 3
+    assert parquet_file.num_row_groups == 3
+
+
+@pytest.fixture
+def fake_main(monkeypatch):
+    """Run main() in-process, recording the stations each worker receives."""
+    calls = []
+    rows_by_station = {}
+
+    def fake_process_station(station_name, api_key, datetime_from):
+        calls.append((station_name, datetime_from))
+        return rows_by_station.get(station_name, 1)
+
+    monkeypatch.setenv("OPENAQ_API_KEY", "fake_test_key")
+    monkeypatch.setattr(fetch_data, "process_station", fake_process_station)
+    # Threads stand in for processes, the fake worker cannot be pickled
+    monkeypatch.setattr(fetch_data, "ProcessPoolExecutor", ThreadPoolExecutor)
+
+    def run(*argv):
+        monkeypatch.setattr("sys.argv", ["fetch_data.py", *argv])
+        fetch_data.main()
+
+    run.calls = calls
+    run.rows_by_station = rows_by_station
+    return run
+
+
+def test_main_runs_single_station_inline(fake_main):
+    """Verify the default single station is processed once, without a pool."""
+    fake_main()
+
+    assert [name for name, _ in fake_main.calls] == ["kossutha"]
+
+
+def test_main_expands_all_stations(fake_main):
+    """Verify 'all' fans out to every station with one shared window start."""
+    fake_main("--station", "all")
+
+    assert sorted(name for name, _ in fake_main.calls) == ["kossutha", "zawodzie"]
+    assert len({start for _, start in fake_main.calls}) == 1
+
+
+def test_main_exits_when_a_station_has_no_data(fake_main):
+    """Ensure a multi-station run fails if any station returned no rows."""
+    fake_main.rows_by_station["zawodzie"] = 0
+
+    with pytest.raises(SystemExit) as exc_info:
+        fake_main("--station", "kossutha", "zawodzie")
+
+    assert exc_info.value.code == 1
+    assert len(fake_main.calls) == 2
+
+
+def test_main_rejects_all_mixed_with_station_names(fake_main):
+    """Ensure 'all' combined with explicit stations is a usage error."""
+    with pytest.raises(SystemExit) as exc_info:
+        fake_main("--station", "kossutha", "all")
+
+    assert exc_info.value.code == 2
+    assert fake_main.calls == []